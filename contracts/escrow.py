@@ -13,18 +13,22 @@ Flow:
 App State:
 - player1: address of first player
 - player2: address of second player
-- wager: amount each player deposited (in microAlgos)
+- state: packed Itob(status) ++ Itob(wager) ++ Itob(last_move)
+    - status: 0=waiting, 1=active, 2=complete
+    - wager: amount each player deposited (in microAlgos)
+    - last_move: timestamp of the last move (for abandon timeout)
 - game_id: unique game identifier
 - winner: address of winner (set when game ends)
-- status: 0=waiting, 1=active, 2=complete
-
-Methods:
-- create_game: Initialize game with wager amount
-- join_game: Second player joins and deposits
-- declare_winner: Game server declares winner
-- claim_winnings: Winner withdraws pot
-- timeout_claim: Claim if opponent abandoned
-- cancel_game: Cancel if no opponent joined
+
+Methods (application_args[0] is a 1-byte selector):
+- create_game: Initialize game with wager amount (app creation, no selector)
+- 0x01 join_game: Second player joins and deposits
+- 0x02 deposit: Player 1 deposits their wager
+- 0x03 declare_winner: Game server declares winner
+- 0x04 claim_winnings: Winner withdraws pot
+- 0x05 cancel_game: Cancel if no opponent joined
+- 0x06 timeout_claim: Claim if opponent abandoned
+- 0x07 update_move: Game server records a move for timeout tracking
 """
 
 from pyteal import *
@@ -36,62 +40,114 @@ def approval_program():
     # Global state keys
     player1_key = Bytes("player1")
     player2_key = Bytes("player2")
-    wager_key = Bytes("wager")
     game_id_key = Bytes("game_id")
     winner_key = Bytes("winner")
-    status_key = Bytes("status")
+    state_key = Bytes("state")  # Itob(status) ++ Itob(wager) ++ Itob(last_move)
     created_at_key = Bytes("created_at")
-    last_move_key = Bytes("last_move")
+
+    # Method selectors (application_args[0], exactly one byte)
+    METHOD_JOIN = Bytes("base16", "0x01")
+    METHOD_DEPOSIT = Bytes("base16", "0x02")
+    METHOD_DECLARE_WINNER = Bytes("base16", "0x03")
+    METHOD_CLAIM = Bytes("base16", "0x04")
+    METHOD_CANCEL = Bytes("base16", "0x05")
+    METHOD_TIMEOUT_CLAIM = Bytes("base16", "0x06")
+    METHOD_UPDATE_MOVE = Bytes("base16", "0x07")
 
     # Status values
     STATUS_WAITING = Int(0)
     STATUS_ACTIVE = Int(1)
     STATUS_COMPLETE = Int(2)
 
+    # Accessors for the packed status/wager/last_move value under state_key
+    def status_of(state):
+        return GetByte(state, Int(7))
+
+    def wager_of(state):
+        return ExtractUint64(state, Int(8))
+
+    def last_move_of(state):
+        return ExtractUint64(state, Int(16))
+
+    def with_status(state, status):
+        return SetByte(state, Int(7), status)
+
+    def with_last_move(state, timestamp):
+        return Replace(state, Int(16), Itob(timestamp))
+
     # Timeout values (in seconds)
     JOIN_TIMEOUT = Int(3600)  # 1 hour to find opponent
     ABANDON_TIMEOUT = Int(259200)  # 3 days for casual games
 
     # Server/oracle address that can declare winners
     # In production, this should be a multisig or decentralized oracle
-    GAME_SERVER = Addr("ALGONIM_SERVER_ADDRESS_REPLACE_ME")
-
-    # Initialize the contract (on creation)
-    @Subroutine(TealType.uint64)
-    def is_creator():
-        return Txn.sender() == Global.creator_address()
+    # Substituted at deploy time so rotating the server key does not require
+    # recompiling the PyTeal. With assembleConstants the template sits in the
+    # bytecblock, so substitute the decoded 32-byte public key as hex
+    # (TMPL_GAME_SERVER=0x<64 hex chars>), not the base32 address string.
+    GAME_SERVER = Tmpl.Addr("TMPL_GAME_SERVER")
+
+    # Send pot to winner (2x wager minus fees)
+    @Subroutine(TealType.none)
+    def pay_winner(receiver: Expr, wager: Expr):
+        return Seq([
+            InnerTxnBuilder.Begin(),
+            InnerTxnBuilder.SetFields({
+                TxnField.type_enum: TxnType.Payment,
+                TxnField.receiver: receiver,
+                TxnField.amount: wager * Int(2) - Int(1000),  # Reserve 1000 for fees
+                TxnField.fee: Int(0),
+            }),
+            InnerTxnBuilder.Submit(),
+        ])
+
+    # Verify the grouped payment deposits the wager into the app account
+    @Subroutine(TealType.none)
+    def assert_wager_payment(wager: Expr):
+        return Assert(And(
+            Gtxn[1].type_enum() == TxnType.Payment,
+            Gtxn[1].receiver() == Global.current_application_address(),
+            Gtxn[1].amount() == wager
+        ))
 
     # Create a new game
     on_create = Seq([
         # Store initial state
         App.globalPut(player1_key, Txn.sender()),
         App.globalPut(player2_key, Global.zero_address()),
-        App.globalPut(wager_key, Btoi(Txn.application_args[0])),
+        App.globalPut(state_key, Concat(
+            Itob(STATUS_WAITING),
+            Itob(Btoi(Txn.application_args[0])),
+            Itob(Global.latest_timestamp())
+        )),
         App.globalPut(game_id_key, Txn.application_args[1]),
         App.globalPut(winner_key, Global.zero_address()),
-        App.globalPut(status_key, STATUS_WAITING),
         App.globalPut(created_at_key, Global.latest_timestamp()),
-        App.globalPut(last_move_key, Global.latest_timestamp()),
         Return(Int(1))
     ])
 
+    # Cache of the packed state value, read once per handler and reused for
+    # the field checks and any rewrite
+    state = ScratchVar(TealType.bytes)
+
     # Join an existing game (player 2)
     on_join = Seq([
+        state.store(App.globalGet(state_key)),
         # Verify game is waiting for player
-        Assert(App.globalGet(status_key) == STATUS_WAITING),
+        Assert(status_of(state.load()) == STATUS_WAITING),
         # Verify sender is not player 1
         Assert(Txn.sender() != App.globalGet(player1_key)),
         # Verify player 2 slot is empty
         Assert(App.globalGet(player2_key) == Global.zero_address()),
         # Verify payment matches wager
-        Assert(Gtxn[1].type_enum() == TxnType.Payment),
-        Assert(Gtxn[1].receiver() == Global.current_application_address()),
-        Assert(Gtxn[1].amount() == App.globalGet(wager_key)),
+        assert_wager_payment(wager_of(state.load())),
 
         # Update state
         App.globalPut(player2_key, Txn.sender()),
-        App.globalPut(status_key, STATUS_ACTIVE),
-        App.globalPut(last_move_key, Global.latest_timestamp()),
+        App.globalPut(state_key, with_last_move(
+            with_status(state.load(), STATUS_ACTIVE),
+            Global.latest_timestamp()
+        )),
         Return(Int(1))
     ])
 
@@ -100,9 +156,7 @@ def approval_program():
         # Verify sender is player 1
         Assert(Txn.sender() == App.globalGet(player1_key)),
         # Verify payment matches wager
-        Assert(Gtxn[1].type_enum() == TxnType.Payment),
-        Assert(Gtxn[1].receiver() == Global.current_application_address()),
-        Assert(Gtxn[1].amount() == App.globalGet(wager_key)),
+        assert_wager_payment(wager_of(App.globalGet(state_key))),
         Return(Int(1))
     ])
 
@@ -114,7 +168,8 @@ def approval_program():
             Txn.sender() == Global.creator_address()
         )),
         # Game must be active
-        Assert(App.globalGet(status_key) == STATUS_ACTIVE),
+        state.store(App.globalGet(state_key)),
+        Assert(status_of(state.load()) == STATUS_ACTIVE),
         # Winner must be one of the players
         Assert(Or(
             Txn.application_args[1] == App.globalGet(player1_key),
@@ -123,36 +178,33 @@ def approval_program():
 
         # Set winner and complete game
         App.globalPut(winner_key, Txn.application_args[1]),
-        App.globalPut(status_key, STATUS_COMPLETE),
+        App.globalPut(state_key, with_status(state.load(), STATUS_COMPLETE)),
         Return(Int(1))
     ])
 
     # Claim winnings (winner withdraws pot)
     on_claim = Seq([
+        state.store(App.globalGet(state_key)),
         # Game must be complete
-        Assert(App.globalGet(status_key) == STATUS_COMPLETE),
+        Assert(status_of(state.load()) == STATUS_COMPLETE),
         # Sender must be the winner
         Assert(Txn.sender() == App.globalGet(winner_key)),
 
         # Send pot to winner (2x wager minus fees)
-        InnerTxnBuilder.Begin(),
-        InnerTxnBuilder.SetFields({
-            TxnField.type_enum: TxnType.Payment,
-            TxnField.receiver: Txn.sender(),
-            TxnField.amount: App.globalGet(wager_key) * Int(2) - Int(1000),  # Reserve 1000 for fees
-            TxnField.fee: Int(0),
-        }),
-        InnerTxnBuilder.Submit(),
+        pay_winner(Txn.sender(), wager_of(state.load())),
 
         Return(Int(1))
     ])
 
     # Cancel game (if no opponent joined within timeout)
+    cancel_player1 = ScratchVar(TealType.bytes)
     on_cancel = Seq([
+        cancel_player1.store(App.globalGet(player1_key)),
         # Only player 1 can cancel
-        Assert(Txn.sender() == App.globalGet(player1_key)),
+        Assert(Txn.sender() == cancel_player1.load()),
         # Game must be waiting
-        Assert(App.globalGet(status_key) == STATUS_WAITING),
+        state.store(App.globalGet(state_key)),
+        Assert(status_of(state.load()) == STATUS_WAITING),
         # Must be past join timeout
         Assert(Global.latest_timestamp() > App.globalGet(created_at_key) + JOIN_TIMEOUT),
 
@@ -160,8 +212,8 @@ def approval_program():
         InnerTxnBuilder.Begin(),
         InnerTxnBuilder.SetFields({
             TxnField.type_enum: TxnType.Payment,
-            TxnField.receiver: App.globalGet(player1_key),
-            TxnField.amount: App.globalGet(wager_key) - Int(1000),
+            TxnField.receiver: cancel_player1.load(),
+            TxnField.amount: wager_of(state.load()) - Int(1000),
             TxnField.fee: Int(0),
         }),
         InnerTxnBuilder.Submit(),
@@ -171,34 +223,31 @@ def approval_program():
 
     # Claim via timeout (opponent abandoned)
     on_timeout_claim = Seq([
+        state.store(App.globalGet(state_key)),
         # Game must be active
-        Assert(App.globalGet(status_key) == STATUS_ACTIVE),
+        Assert(status_of(state.load()) == STATUS_ACTIVE),
         # Sender must be a player
         Assert(Or(
             Txn.sender() == App.globalGet(player1_key),
             Txn.sender() == App.globalGet(player2_key)
         )),
         # Must be past abandon timeout
-        Assert(Global.latest_timestamp() > App.globalGet(last_move_key) + ABANDON_TIMEOUT),
+        Assert(Global.latest_timestamp() > last_move_of(state.load()) + ABANDON_TIMEOUT),
 
         # The claimer wins by opponent abandonment
         App.globalPut(winner_key, Txn.sender()),
-        App.globalPut(status_key, STATUS_COMPLETE),
+        App.globalPut(state_key, with_status(state.load(), STATUS_COMPLETE)),
 
         # Send pot to winner
-        InnerTxnBuilder.Begin(),
-        InnerTxnBuilder.SetFields({
-            TxnField.type_enum: TxnType.Payment,
-            TxnField.receiver: Txn.sender(),
-            TxnField.amount: App.globalGet(wager_key) * Int(2) - Int(1000),
-            TxnField.fee: Int(0),
-        }),
-        InnerTxnBuilder.Submit(),
+        pay_winner(Txn.sender(), wager_of(state.load())),
 
         Return(Int(1))
     ])
 
     # Update last move timestamp (for timeout tracking)
+    # Rewriting the packed state costs 5 more ops per turn than a standalone
+    # last_move uint put, in exchange for one fewer uint slot in the global
+    # schema (28,500 microAlgos lower min-balance per escrow app)
     on_update_move = Seq([
         # Only game server can update move time
         Assert(Or(
@@ -206,26 +255,37 @@ def approval_program():
             Txn.sender() == Global.creator_address()
         )),
         # Game must be active
-        Assert(App.globalGet(status_key) == STATUS_ACTIVE),
+        state.store(App.globalGet(state_key)),
+        Assert(status_of(state.load()) == STATUS_ACTIVE),
 
-        App.globalPut(last_move_key, Global.latest_timestamp()),
+        App.globalPut(state_key, with_last_move(state.load(), Global.latest_timestamp())),
         Return(Int(1))
     ])
 
-    # Route based on application call
+    # Route method calls by expected frequency: update_move runs every turn,
+    # declare_winner/claim once per game, deposit/cancel rarely
+    on_method = Cond(
+        [Txn.application_args[0] == METHOD_UPDATE_MOVE, on_update_move],
+        [Txn.application_args[0] == METHOD_DECLARE_WINNER, on_declare_winner],
+        [Txn.application_args[0] == METHOD_CLAIM, on_claim],
+        [Txn.application_args[0] == METHOD_JOIN, on_join],
+        [Txn.application_args[0] == METHOD_TIMEOUT_CLAIM, on_timeout_claim],
+        [Txn.application_args[0] == METHOD_DEPOSIT, on_deposit],
+        [Txn.application_args[0] == METHOD_CANCEL, on_cancel],
+    )
+
+    # Route based on application call. Method calls (NoOp) are checked
+    # right after creation so update_move reaches its handler after two
+    # int compares and a single selector compare.
     program = Cond(
         [Txn.application_id() == Int(0), on_create],
-        [Txn.on_completion() == OnComplete.DeleteApplication, Return(is_creator())],
-        [Txn.on_completion() == OnComplete.UpdateApplication, Return(is_creator())],
+        [Txn.on_completion() == OnComplete.NoOp, on_method],
+        [Or(
+            Txn.on_completion() == OnComplete.DeleteApplication,
+            Txn.on_completion() == OnComplete.UpdateApplication
+        ), Return(Txn.sender() == Global.creator_address())],
         [Txn.on_completion() == OnComplete.CloseOut, Return(Int(1))],
         [Txn.on_completion() == OnComplete.OptIn, Return(Int(1))],
-        [Txn.application_args[0] == Bytes("join"), on_join],
-        [Txn.application_args[0] == Bytes("deposit"), on_deposit],
-        [Txn.application_args[0] == Bytes("declare_winner"), on_declare_winner],
-        [Txn.application_args[0] == Bytes("claim"), on_claim],
-        [Txn.application_args[0] == Bytes("cancel"), on_cancel],
-        [Txn.application_args[0] == Bytes("timeout_claim"), on_timeout_claim],
-        [Txn.application_args[0] == Bytes("update_move"), on_update_move],
     )
 
     return program
@@ -240,13 +300,36 @@ if __name__ == "__main__":
     # Compile and output TEAL
     import json
 
+    # With assembleConstants, constants used more than once (state keys,
+    # 0/1/2, the 1000 fee reserve) go in the intcblock/bytecblock, while
+    # single-use ones (the timeouts, method selectors) are emitted
+    # inline as pushint/pushbytes so they don't take up a block slot.
+    # frame_pointers compiles the subroutines (pay_winner,
+    # assert_wager_payment) to proto/frame_dig instead of passing arguments
+    # through scratch slots. scratch_slots only removes a `store i; load i`
+    # pair whose slot is never read again; every ScratchVar here is loaded
+    # more than once, so it currently leaves the output unchanged.
+    optimize = OptimizeOptions(scratch_slots=True, frame_pointers=True)
+
     # Compile approval program
-    approval_teal = compileTeal(approval_program(), mode=Mode.Application, version=8)
+    approval_teal = compileTeal(
+        approval_program(),
+        mode=Mode.Application,
+        version=8,
+        assembleConstants=True,
+        optimize=optimize,
+    )
     print("=== APPROVAL PROGRAM ===")
     print(approval_teal)
 
     # Compile clear program
-    clear_teal = compileTeal(clear_state_program(), mode=Mode.Application, version=8)
+    clear_teal = compileTeal(
+        clear_state_program(),
+        mode=Mode.Application,
+        version=8,
+        assembleConstants=True,
+        optimize=optimize,
+    )
     print("\n=== CLEAR STATE PROGRAM ===")
     print(clear_teal)
 